@@ -1,8 +1,11 @@
 import time
 from pathlib import Path
+from typing import Dict, List, Optional
 
+import pytest
 import dash
 from dash.testing.composite import DashComposite
+from selenium.webdriver.remote.webdriver import WebDriver
 
 from webviz_config import WebvizSettings
 from webviz_config.common_cache import CACHE
@@ -10,42 +13,46 @@ from webviz_config.themes import default_theme
 from webviz_config.generic_plugins import _table_plotter
 
 
-def test_table_plotter(dash_duo: DashComposite) -> None:
-
-    app = dash.Dash(__name__)
-    app.config.suppress_callback_exceptions = True
-    CACHE.init_app(app.server)
-    webviz_settings = WebvizSettings({}, default_theme)
-    csv_file = Path("./tests/data/example_data.csv")
-    page = _table_plotter.TablePlotter(app, webviz_settings, csv_file)
-    app.layout = page.layout
-    dash_duo.start_server(app)
-
-    # Wait for the app to render(there is probably a better way...)
-    time.sleep(5)
-
-    # Checking that no plot options are defined
-    assert page.plot_options == {}
-    # Check that filter is not active
-    assert not page.use_filter
-
-    # Checking that the correct plot type is initialized
-    plot_dd = dash_duo.find_element("#" + page.uuid("plottype"))
-    assert plot_dd.text == "scatter"
+def _batch_query(driver: WebDriver, ids: List[str]) -> List[str]:
+    """Returns the text of the elements with the given ids, using a single
+    WebDriver round-trip instead of one per element. Raises a JavascriptException
+    naming the id if an element is not found.
+    """
+    return driver.execute_script(
+        "return arguments[0].map(id => {"
+        "  const e = document.getElementById(id);"
+        "  if (e === null) throw new Error(`Element with id '${id}' not found`);"
+        "  return e.innerText;"
+        "})",
+        ids,
+    )
 
-    # Checking that only the relevant options are shown
-    for plot_option in page.plot_args.keys():
-        plot_option_dd = dash_duo.find_element("#" + page.uuid(f"div-{plot_option}"))
-        if plot_option not in page.plots["scatter"]:
-            assert plot_option_dd.get_attribute("style") == "display: none;"
 
-    # Checking that options are initialized correctly
-    for option in ["x", "y"]:
-        plot_option_dd = dash_duo.find_element("#" + page.uuid(f"dropdown-{option}"))
-        assert plot_option_dd.text == "Well"
+def _computed_displays(driver: WebDriver, ids: List[str]) -> Dict[str, Optional[str]]:
+    """Returns the computed display style of the elements with the given ids,
+    keyed by id, evaluating one compound CSS selector in a single WebDriver
+    round-trip. Ids not found in the DOM are mapped to None.
+    """
+    displays = driver.execute_script(
+        "const displays = {};"
+        "document.querySelectorAll(arguments[0]).forEach(e => {"
+        "  displays[e.id] = getComputedStyle(e).display;"
+        "});"
+        "return displays;",
+        ", ".join(f"#{id_}" for id_ in ids),
+    )
+    return {id_: displays.get(id_) for id_ in ids}
 
 
-def test_table_plotter_filter(dash_duo: DashComposite) -> None:
+@pytest.mark.parametrize(
+    "filter_cols, expected_filter_cols",
+    [(None, []), (["Well"], ["Well"])],
+)
+def test_table_plotter(
+    dash_duo: DashComposite,
+    filter_cols: Optional[List[str]],
+    expected_filter_cols: List[str],
+) -> None:
 
     app = dash.Dash(__name__)
     app.config.suppress_callback_exceptions = True
@@ -53,7 +60,7 @@ def test_table_plotter_filter(dash_duo: DashComposite) -> None:
     webviz_settings = WebvizSettings({}, default_theme)
     csv_file = Path("./tests/data/example_data.csv")
     page = _table_plotter.TablePlotter(
-        app, webviz_settings, csv_file, filter_cols=["Well"]
+        app, webviz_settings, csv_file, filter_cols=filter_cols
     )
     app.layout = page.layout
     dash_duo.start_server(app)
@@ -63,24 +70,27 @@ def test_table_plotter_filter(dash_duo: DashComposite) -> None:
 
     # Checking that no plot options are defined
     assert page.plot_options == {}
-    # Check that filter is active
-    assert page.use_filter
-    assert page.filter_cols == ["Well"]
+    # Check that filter is only active when filter columns are given
+    assert page.use_filter == bool(expected_filter_cols)
+    assert page.filter_cols == expected_filter_cols
 
     # Checking that the correct plot type is initialized
     plot_dd = dash_duo.find_element("#" + page.uuid("plottype"))
     assert plot_dd.text == "scatter"
 
     # Checking that only the relevant options are shown
-    for plot_option in page.plot_args.keys():
-        plot_option_dd = dash_duo.find_element("#" + page.uuid(f"div-{plot_option}"))
-        if plot_option not in page.plots["scatter"]:
-            assert "display: none;" in plot_option_dd.get_attribute("style")
+    hidden_ids = [
+        page.uuid(f"div-{opt}")
+        for opt in set(page.plot_args) - set(page.plots["scatter"])
+    ]
+    displays = _computed_displays(dash_duo.driver, hidden_ids)
+    assert displays == dict.fromkeys(hidden_ids, "none")
 
     # Checking that options are initialized correctly
-    for option in ["x", "y"]:
-        plot_option_dd = dash_duo.find_element("#" + page.uuid(f"dropdown-{option}"))
-        assert plot_option_dd.text == "Well"
+    dropdown_texts = _batch_query(
+        dash_duo.driver, [page.uuid(f"dropdown-{opt}") for opt in ["x", "y"]]
+    )
+    assert [text.strip() for text in dropdown_texts] == ["Well", "Well"]
 
 
 def test_initialized_table_plotter(dash_duo: DashComposite) -> None:
@@ -5,7 +5,9 @@ import os
 import time
 import secrets
 import pathlib
+import functools
 import warnings
+import threading
 import webbrowser
 import contextlib
 import subprocess
@@ -58,6 +60,25 @@ def _azure_cli(args: List[str], devnull_stderr: bool = True) -> Any:
     return cli.result.result
 
 
+def _open_url(url: str) -> None:
+    """Opens the URL in the user's browser. A GUI browser is opened in a
+    background thread, as webbrowser.open can block for some seconds while it
+    starts. Terminal browsers (webbrowser.GenericBrowser, e.g. lynx or w3m when
+    there is no display) run in the foreground and need the terminal, so those
+    are opened blocking.
+    """
+    try:
+        browser = webbrowser.get()
+    except webbrowser.Error:
+        # No browser available, webbrowser.open would silently do nothing as well.
+        return
+
+    if isinstance(browser, webbrowser.GenericBrowser):
+        browser.open(url)
+    else:
+        threading.Thread(target=browser.open, args=(url,), daemon=True).start()
+
+
 def logged_in() -> bool:
     """Returns true if user is logged into Azure,
     otherwise returns False.
@@ -106,18 +127,44 @@ def storage_account_name_available(name: str) -> Tuple[bool, str]:
 
 
 def storage_account_exists(name: str, subscription: str, resource_group: str) -> bool:
+    # Storage account names are globally unique. If the name is available,
+    # there is no need to list existing storage accounts.
+    if storage_account_name_available(name)[0]:
+        return False
+
     accounts = _azure_cli(
-        ["storage", "account", "list", "--subscription", subscription]
+        [
+            "storage",
+            "account",
+            "list",
+            "--resource-group",
+            resource_group,
+            "--subscription",
+            subscription,
+        ]
     )
+    if any(account["name"] == name for account in accounts):
+        return True
 
-    for account in accounts:
-        if account["name"] == name:
-            if account["resourceGroup"] != resource_group:
-                warnings.warn(
-                    f"Storage account with name {name} found, but it belongs "
-                    f"to another resource group ({account['resourceGroup']}."
-                )
-            return True
+    # Name is taken, but not in the selected resource group. Only then look
+    # through the whole subscription, in order to give a more helpful warning.
+    match = next(
+        (
+            account
+            for account in _azure_cli(
+                ["storage", "account", "list", "--subscription", subscription]
+            )
+            if account["name"] == name
+        ),
+        None,
+    )
+
+    if match is not None:
+        warnings.warn(
+            f"Storage account with name {name} found, but it belongs "
+            f"to another resource group ({match['resourceGroup']})."
+        )
+        return True
 
     return False
 
@@ -141,6 +188,20 @@ def storage_container_exists(
     return any(container["name"] == container_name for container in containers)
 
 
+@functools.lru_cache(maxsize=1)
+def _signed_in_user_object_id() -> str:
+    return _azure_cli(
+        ["ad", "signed-in-user", "show", "--query", "objectId", "-o", "tsv"]
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _resource_group_id(subscription: str, resource_group: str) -> str:
+    return _azure_cli(
+        ["group", "show", "--subscription", subscription, "--name", resource_group]
+    )["id"]
+
+
 def create_storage_account(subscription: str, resource_group: str, name: str) -> None:
     """Creates an Azure storage account. Also adds upload access, as well
     as possibility to list/generate access keys, to the user creating it
@@ -177,7 +238,7 @@ def create_storage_account(subscription: str, resource_group: str, name: str) ->
         except (HttpResponseError, CloudError) as exc:
             if "AuthorizationFailed" in str(exc):
                 if not azure_pim_already_open:
-                    webbrowser.open(f"{PIMCOMMON_URL}/azurerbac")
+                    _open_url(f"{PIMCOMMON_URL}/azurerbac")
                     print(
                         "Not able to create new storage account. Do you have "
                         "enough priviliges to do it? We automatically opened the URL "
@@ -192,12 +253,8 @@ def create_storage_account(subscription: str, resource_group: str, name: str) ->
             else:
                 raise RuntimeError("Not able to create new storage account.") from exc
 
-    user_id: str = _azure_cli(
-        ["ad", "signed-in-user", "show", "--query", "objectId", "-o", "tsv"]
-    )
-    resource_group_id: str = _azure_cli(
-        ["group", "show", "--subscription", subscription, "--name", resource_group]
-    )["id"]
+    user_id = _signed_in_user_object_id()
+    resource_group_id = _resource_group_id(subscription, resource_group)
 
     for role in [
         "Storage Blob Data Contributor",
@@ -210,8 +267,12 @@ def create_storage_account(subscription: str, resource_group: str, name: str) ->
                 "create",
                 "--role",
                 role,
-                "--assignee",
+                # Giving object id and principal type directly saves the Azure CLI
+                # from resolving the assignee through the Graph API:
+                "--assignee-object-id",
                 user_id,
+                "--assignee-principal-type",
+                "User",
                 "--scope",
                 f"{resource_group_id}/providers/Microsoft.Storage/storageAccounts/{name}",
             ]
@@ -278,6 +339,9 @@ def storage_container_upload_folder(
         "login",
         "--source",
         str(source_folder),
+        # Number of parallel connections used when uploading (large) blobs:
+        "--max-connections",
+        "16",
     ]
 
     for _ in range(5):
@@ -311,9 +375,10 @@ def storage_container_upload_folder(
                 # Azure CLI shows progress in stderr,
                 # i.e. even successfull runs have content in stderr
                 return
-        finally:
-            print("Waiting on Azure access activation... please wait.")
-            time.sleep(60)
+
+        # Only wait if the upload failed, i.e. not after a successful upload.
+        print("Waiting on Azure access activation... please wait.")
+        time.sleep(60)
 
     raise RuntimeError("Not able to upload folder to blob storage container.")
 
@@ -330,14 +395,19 @@ def existing_app_registration(display_name: str) -> Optional[str]:
     return None
 
 
-def create_app_registration(display_name: str) -> str:
+def create_app_registration(display_name: str) -> Tuple[str, bool]:
+    """Returns the app registration id for the given display name, creating the
+    app registration if it does not already exist. The second returned value
+    is True if a new app registration was created.
+    """
 
     existing = existing_app_registration(display_name)
 
+    if existing is not None:
+        return existing, False
+
     return (
-        existing
-        if existing is not None
-        else _azure_cli(
+        _azure_cli(
             [
                 "ad",
                 "app",
@@ -345,7 +415,8 @@ def create_app_registration(display_name: str) -> str:
                 "--display-name",
                 display_name,
             ]
-        )["appId"]
+        )["appId"],
+        True,
     )
 
 
@@ -379,8 +450,10 @@ def add_reply_url(app_registration_id: str, reply_url: str) -> None:
     app_data = _azure_cli(["ad", "app", "show", "--id", app_registration_id])
 
     reply_urls = app_data["replyUrls"]
-    if reply_url not in reply_urls:
-        reply_urls.append(reply_url)
+    if reply_url in reply_urls:
+        return
+
+    reply_urls.append(reply_url)
 
     _azure_cli(
         [
@@ -395,9 +468,17 @@ def add_reply_url(app_registration_id: str, reply_url: str) -> None:
     )
 
 
-def create_service_principal(app_registration_id: str) -> Tuple[str, str]:
-    existing_service_principal = _azure_cli(
-        ["ad", "sp", "list", "--filter", f"appId eq '{app_registration_id}'"]
+def create_service_principal(
+    app_registration_id: str, new_app_registration: bool = False
+) -> Tuple[str, str]:
+    # A newly created app registration can not have a service principal yet,
+    # i.e. no need to look for an existing one.
+    existing_service_principal = (
+        []
+        if new_app_registration
+        else _azure_cli(
+            ["ad", "sp", "list", "--filter", f"appId eq '{app_registration_id}'"]
+        )
     )
 
     service_principal = (
@@ -431,13 +512,17 @@ def azure_app_registration_setup(
 
     while True:
         try:
-            app_registration_id = create_app_registration(display_name)
-            object_id, tenant_id = create_service_principal(app_registration_id)
+            app_registration_id, new_app_registration = create_app_registration(
+                display_name
+            )
+            object_id, tenant_id = create_service_principal(
+                app_registration_id, new_app_registration
+            )
             break
         except azure.cli.core.CLIError as exc:
 
             if not azure_pim_already_open:
-                webbrowser.open(f"{PIMCOMMON_URL}/aadmigratedroles")
+                _open_url(f"{PIMCOMMON_URL}/aadmigratedroles")
                 azure_pim_already_open = True
 
                 print(exc)